@@ -14,16 +14,24 @@ Date: October 16, 2025
 
 import os
 import re
-import pandas as pd
-import pdfplumber
-import openpyxl
-from openpyxl.utils import range_boundaries
+import json
+import hashlib
+import multiprocessing
+from itertools import zip_longest
 from datetime import datetime
 
+# numpy, pandas, pymupdf, openpyxl and xlsxwriter are imported inside the functions
+# that use them, so a run with no new PDFs or no summary workbook starts quickly
+
 # Configuration
 DATA_DIR = 'data'
 CSV_DIR = 'csv'
 SUMMARY_FILE = 'summary.xlsx'
+HASH_FILE = os.path.join(CSV_DIR, '.hashes.json')
+
+# Filename patterns: source PDFs and the daily Excel files generated from them
+_DATE_RE = re.compile(r'RJODailyFOBComparative(\d{4}-\d{2}-\d{2})')
+_FOB_RE = re.compile(r'FOB_(\d{8})')
 
 # Ordered list of sheets/products as they appear in the PDF (Left->Right, Top->Bottom)
 SHEET_NAMES = [
@@ -52,51 +60,105 @@ def ensure_directories():
 
 def get_date_from_filename(filename):
     """Extract date from filename like RJODailyFOBComparative2025-10-15202510.pdf"""
-    match = re.search(r'RJODailyFOBComparative(\d{4}-\d{2}-\d{2})', filename)
+    match = _DATE_RE.search(filename)
     if match:
         return match.group(1)
     return None
 
+def file_sha256(path):
+    """Return the hex sha256 digest of the file at path."""
+    with open(path, 'rb') as f:
+        if hasattr(hashlib, 'file_digest'):
+            return hashlib.file_digest(f, 'sha256').hexdigest()
+        h = hashlib.sha256()
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+        return h.hexdigest()
+
+def load_hashes():
+    """Load the {pdf filename: {'sha256', 'size', 'mtime_ns'}} map of already processed PDFs."""
+    if not os.path.exists(HASH_FILE):
+        return {}
+    try:
+        with open(HASH_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Warning: could not read {HASH_FILE}: {e}")
+        return {}
+
+def save_hashes(hashes):
+    """Save the {pdf filename: {'sha256', 'size', 'mtime_ns'}} map of already processed PDFs."""
+    with open(HASH_FILE, 'w') as f:
+        json.dump(hashes, f, indent=2, sort_keys=True)
+
+def pdf_record(path, stat, previous):
+    """
+    Returns the {'sha256', 'size', 'mtime_ns'} record for the PDF at path.
+    The file is only read and hashed if its size or mtime differ from the previous record.
+    """
+    if (previous is not None and previous.get('size') == stat.st_size
+            and previous.get('mtime_ns') == stat.st_mtime_ns):
+        return previous
+    return {'sha256': file_sha256(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
 def parse_pdf_to_dfs(pdf_path, date_str):
     """
     Parses the PDF and returns a dictionary of {sheet_name: dataframe}.
     """
+    import numpy as np
+    import pandas as pd
+    import pymupdf
+    
     print(f"Parsing PDF: {pdf_path}")
+    # Same date for every row of every product, so parse it once
+    date_val = datetime.strptime(date_str, '%Y-%m-%d')
     
-    with pdfplumber.open(pdf_path) as pdf:
-        if not pdf.pages:
+    doc = pymupdf.open(pdf_path)
+    try:
+        if doc.page_count == 0:
             print("  No pages found in PDF.")
             return {}
         
-        page = pdf.pages[0]
-        tables = page.extract_tables()
+        # Only the first page holds the table; later pages (disclaimers) are never loaded
+        page = doc.load_page(0)
+        tables = page.find_tables()
         
-        if not tables:
+        if not tables.tables:
             print("  No tables found on first page.")
             return {}
         
-        raw_data = tables[0]
+        raw_data = tables[0].extract()
+    finally:
+        doc.close()
 
+    # Build one DataFrame for the whole table (rows padded/trimmed to the 17 grid
+    # columns); each product's sheet is then a row/column slice of it
+    # Columns: 0=Month, 1-4=Prod1, 5-8=Prod2, 9-12=Prod3, 13-16=Prod4
+    n_cols = 1 + 4 * 4
+    table = pd.DataFrame([list(r[:n_cols]) + [None] * (n_cols - len(r)) for r in raw_data],
+                         columns=range(n_cols))
+    months = table[0].fillna('').astype(str).str.strip()
+    
     # Identify the 7 sections
     # We look for rows where the second column (index 1) has text, which indicates a header row.
     # The structure is: Header Row, Subheader Row, Data Rows...
-    
-    section_starts = []
-    for i, row in enumerate(raw_data):
-        # Heuristic: Header rows have text in the second column (index 1) 
-        # and usually empty first column (index 0)
-        if i < len(raw_data) and row[1] and str(row[1]).strip():
-            # Check if it's a subheader row (contains 'vs')
-            if 'vs' in str(row[1]):
-                continue
-            # Check if it's a data row (Month name in first col)
-            if row[0] and str(row[0]).strip():
-                continue
-                
-            section_starts.append(i)
+    # Heuristic: Header rows have text in the second column (index 1),
+    # which isn't a subheader ('vs ...'), and an empty first column (no Month name)
+    col1 = table[1].fillna('').astype(str)
+    header_mask = ((col1.str.strip() != '')
+                   & ~col1.str.contains('vs', regex=False)
+                   & (months == ''))
+    section_starts = np.flatnonzero(header_mask.to_numpy()).tolist()
 
     if len(section_starts) != 7:
         print(f"  Warning: Found {len(section_starts)} sections, expected 7. Trying to proceed...")
+    
+    # Valid data rows must have a month in col 0
+    # Also filter out disclaimer/footer rows which might appear in the last section
+    # Month names are short. Disclaimer text is long or contains specific keywords.
+    valid = ((months != '')
+             & ~months.str.contains('Price|Disclaimer')
+             & (months.str.len() <= 15)).to_numpy()
 
     results = {}
     
@@ -113,27 +175,11 @@ def parse_pdf_to_dfs(pdf_path, date_str):
         # Row 0: Headers (Product Names) - We use the predefined SHEET_NAMES instead
         # Row 1: Subheaders (vs, Chg, Flat, Chg)
         # Row 2+: Data
+        data_start = start_row + 2
+        valid_rows = data_start + np.flatnonzero(valid[data_start:end_row])
+        section_months = months.iloc[valid_rows].to_numpy()
         
         # There are 4 products per section
-        # Columns: 0=Month, 1-4=Prod1, 5-8=Prod2, 9-12=Prod3, 13-16=Prod4
-        
-        data_rows = section_data[2:]
-        
-        # Filter valid data rows (must have a month in col 0)
-        # Also filter out disclaimer/footer rows which might appear in the last section
-        valid_rows = []
-        for r in data_rows:
-            if not r[0] or not str(r[0]).strip():
-                continue
-            
-            val = str(r[0]).strip()
-            # Filter out disclaimer or footer text
-            # Month names are short. Disclaimer text is long or contains specific keywords.
-            if "Price" in val or "Disclaimer" in val or len(val) > 15:
-                continue
-                
-            valid_rows.append(r)
-        
         for i in range(4):
             # Calculate global product index
             prod_idx = (section_idx * 4) + i
@@ -148,27 +194,6 @@ def parse_pdf_to_dfs(pdf_path, date_str):
             col_start = 1 + (i * 4)
             col_end = col_start + 4
             
-            # Build list of dicts
-            clean_data = []
-            for row in valid_rows:
-                if len(row) > col_start:
-                    # Get the chunk
-                    chunk = row[col_start:col_end]
-                    # Pad if necessary
-                    while len(chunk) < 4:
-                        chunk.append(None)
-                        
-                    entry = {
-                        'Month': str(row[0]).strip(),
-                        'vs': chunk[0],
-                        'Chg1': chunk[1],
-                        'Flat': chunk[2],
-                        'Chg2': chunk[3],
-                        'Date': datetime.strptime(date_str, '%Y-%m-%d')
-                    }
-                    clean_data.append(entry)
-            
-            df = pd.DataFrame(clean_data)
             # Rename 'vs' column to include the comparison target if possible, 
             # but user requested specific format: Month, vs W, Chg1, Flat, Chg2, Date
             # The subheader row (row[1]) has the specific 'vs W', 'vs KW' etc.
@@ -180,51 +205,223 @@ def parse_pdf_to_dfs(pdf_path, date_str):
                 if val:
                     vs_header = str(val).strip()
             
-            if not df.empty:
-                df = df.rename(columns={'vs': vs_header})
+            df = table.iloc[valid_rows, col_start:col_end].copy()
+            df.columns = [vs_header, 'Chg1', 'Flat', 'Chg2']
+            df.insert(0, 'Month', section_months)
+            df['Date'] = date_val
+            df.reset_index(drop=True, inplace=True)
                 
             results[sheet_name] = df
 
     return results
 
+def dataframe_rows(df):
+    """Yield the rows of df as tuples, with pandas missing values (NaN/NaT/NA) as None."""
+    import pandas as pd
+    for row in df.itertuples(index=False, name=None):
+        yield tuple(None if pd.isna(v) else v for v in row)
+
+def write_daily_workbook(output_path, dfs):
+    """
+    Write {sheet_name: dataframe} to output_path with xlsxwriter in constant_memory mode,
+    which flushes each row to disk as soon as the next one starts.
+    Rows are written in order with write_row (pandas' to_excel writes column by column,
+    which constant_memory mode doesn't support).
+    The workbook is written to a temporary file next to output_path and only moved into
+    place once complete, so a failed write never leaves a partial file or replaces an
+    existing one.
+    """
+    import xlsxwriter
+    
+    tmp_path = output_path + '.tmp'
+    try:
+        wb = xlsxwriter.Workbook(tmp_path, {
+            'constant_memory': True,
+            'default_date_format': 'yyyy-mm-dd',
+        })
+        for sheet_name, df in dfs.items():
+            ws = wb.add_worksheet(sheet_name)
+            ws.write_row(0, 0, list(df.columns))
+            for r_idx, row in enumerate(dataframe_rows(df), start=1):
+                ws.write_row(r_idx, 0, row)
+        wb.close()
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def _process_one(pdf_file, date_str, output_filename):
+    """Parse a single PDF from DATA_DIR and write its daily Excel file to CSV_DIR.
+    Returns True if the output file was written."""
+    print(f"Processing {pdf_file} -> {output_filename}")
+    
+    try:
+        pdf_path = os.path.join(DATA_DIR, pdf_file)
+        output_path = os.path.join(CSV_DIR, output_filename)
+        dfs = parse_pdf_to_dfs(pdf_path, date_str)
+        
+        # Don't write sheets for products that yielded no rows
+        skipped = [sheet_name for sheet_name, df in dfs.items() if df.empty]
+        if skipped:
+            print(f"  Warning: No rows extracted for {', '.join(skipped)}. Sheets not written.")
+            dfs = {sheet_name: df for sheet_name, df in dfs.items() if not df.empty}
+        
+        if dfs:
+            write_daily_workbook(output_path, dfs)
+            print(f"  Created {output_filename}")
+            return True
+        else:
+            print("  Failed to extract data.")
+            
+    except Exception as e:
+        print(f"  Error processing {pdf_file}: {e}")
+    return False
+
 def process_daily_pdfs():
     """Step 1: Iterate PDFs and create Excel files."""
     print("\n--- Step 1: Processing Daily PDFs ---")
     
-    files = [f for f in os.listdir(DATA_DIR) if f.endswith('.pdf')]
+    with os.scandir(DATA_DIR) as it:
+        files = [e for e in it if e.name.endswith('.pdf') and e.is_file()]
+    # One directory read instead of an os.path.exists call per PDF
+    with os.scandir(CSV_DIR) as it:
+        existing_outputs = {e.name for e in it}
     
-    for pdf_file in files:
+    # Several PDFs can carry the same date (the filename has a suffix after it) and so
+    # map to the same output file; use only the last one in sorted order for each date
+    # so no two workers ever write the same file
+    by_output = {} # output_filename -> (DirEntry, date_str)
+    for entry in sorted(files, key=lambda e: e.name):
+        pdf_file = entry.name
         date_str = get_date_from_filename(pdf_file)
         if not date_str:
             print(f"Skipping {pdf_file}: Could not parse date.")
             continue
-            
+        
         # Format output filename: FOB_%Y%M%D.xlsx -> FOB_YYYYMMDD.xlsx
         # User requested FOB_%Y%M%D, assuming YYYYMMDD
         date_obj = datetime.strptime(date_str, '%Y-%m-%d')
         output_filename = f"FOB_{date_obj.strftime('%Y%m%d')}.xlsx"
-        output_path = os.path.join(CSV_DIR, output_filename)
         
-        if os.path.exists(output_path):
-            # print(f"Skipping {pdf_file}: {output_filename} already exists.")
-            continue
+        if output_filename in by_output:
+            print(f"Skipping {by_output[output_filename][0].name}: superseded by {pdf_file} for {output_filename}.")
+        by_output[output_filename] = (entry, date_str)
+    
+    # Work out which PDFs still need an output file before forking any workers
+    # Existing outputs are only adopted without reparsing on the first run after
+    # hashes were introduced, i.e. when HASH_FILE doesn't exist yet
+    adopt_existing = not os.path.exists(HASH_FILE)
+    hashes = load_hashes()
+    saved_hashes = dict(hashes)
+    pending = []
+    pending_records = []
+    for output_filename, (entry, date_str) in by_output.items():
+        pdf_file = entry.name
+        record = pdf_record(entry.path, entry.stat(), hashes.get(pdf_file))
+        output_exists = output_filename in existing_outputs
+        
+        if output_exists:
+            if adopt_existing:
+                hashes[pdf_file] = record
             
-        print(f"Processing {pdf_file} -> {output_filename}")
+            # Skip PDFs whose content is unchanged since their output was written
+            recorded = hashes.get(pdf_file)
+            if recorded is not None and recorded['sha256'] == record['sha256']:
+                # Keep the new size/mtime so a touched but unchanged PDF isn't rehashed again
+                hashes[pdf_file] = record
+                # print(f"Skipping {pdf_file}: {output_filename} already exists.")
+                continue
         
-        try:
-            pdf_path = os.path.join(DATA_DIR, pdf_file)
-            dfs = parse_pdf_to_dfs(pdf_path, date_str)
+        pending.append((pdf_file, date_str, output_filename))
+        pending_records.append(record)
+    
+    if pending:
+        # Each pending PDF writes a distinct output file, so they can be parsed in parallel
+        with multiprocessing.Pool(min(os.cpu_count() or 1, len(pending))) as pool:
+            results = pool.starmap(_process_one, pending)
+        
+        for (pdf_file, _, _), record, ok in zip(pending, pending_records, results):
+            if ok:
+                hashes[pdf_file] = record
+    
+    if hashes != saved_hashes:
+        save_hashes(hashes)
+
+def to_datetime_column(series, where=None):
+    """Return series as datetime64, skipping the conversion if it already is one.
+    Values are datetimes read by openpyxl or ISO strings, so ISO8601 is tried first;
+    anything else falls back to per-value format inference.
+    If where is given, values that still can't be parsed are reported with it."""
+    import pandas as pd
+    
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    converted = pd.to_datetime(series, format='ISO8601', errors='coerce', cache=True)
+    failed = converted.isna() & series.notna()
+    if failed.any():
+        converted[failed] = pd.to_datetime(series[failed], format='mixed', errors='coerce')
+        failed = converted.isna() & series.notna()
+        if failed.any() and where:
+            print(f"  Warning: Could not parse Date values in {where}: {series[failed].tolist()}")
+    return converted
+
+def scan_summary_dates():
+    """
+    Reads SUMMARY_FILE in read-only mode and returns {sheet_name: set of existing dates},
+    with dates as int64 nanoseconds. Only the 'Date' column of each sheet is collected.
+    """
+    import openpyxl
+    import pandas as pd
+    
+    existing = {}
+    wb_ro = openpyxl.load_workbook(SUMMARY_FILE, read_only=True, data_only=True)
+    try:
+        sheets_present = set(wb_ro.sheetnames)
+        for sheet_name in SHEET_NAMES:
+            if sheet_name not in sheets_present:
+                print(f"Sheet '{sheet_name}' not found in summary workbook. Skipping.")
+                continue
+                
+            # The header row is the first row containing 'Date'
+            date_col = None
+            dates = []
+            for row in wb_ro[sheet_name].iter_rows(values_only=True):
+                if date_col is None:
+                    if 'Date' in row:
+                        date_col = row.index('Date')
+                elif date_col < len(row):
+                    dates.append(row[date_col])
             
-            if dfs:
-                with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-                    for sheet_name, df in dfs.items():
-                        df.to_excel(writer, sheet_name=sheet_name, index=False)
-                print(f"  Created {output_filename}")
-            else:
-                print("  Failed to extract data.")
+            if date_col is None:
+                print(f"No 'Date' column in {sheet_name}. Skipping.")
+                continue
                 
-        except Exception as e:
-            print(f"  Error processing {pdf_file}: {e}")
+            stamps = to_datetime_column(pd.Series(dates, dtype=object)).dropna()
+            existing[sheet_name] = set(stamps.to_numpy(dtype='datetime64[ns]').view('int64').tolist())
+    finally:
+        wb_ro.close()
+    return existing
+
+def read_daily_sheets(file_path, sheet_names):
+    """
+    Opens a daily Excel file once (read-only) and returns {sheet_name: list of row tuples}
+    for each of sheet_names found in it, header row first.
+    """
+    import openpyxl
+    
+    sheets = {}
+    daily_wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        sheets_present = set(daily_wb.sheetnames)
+        for sheet_name in sheet_names:
+            if sheet_name not in sheets_present:
+                print(f"  Sheet '{sheet_name}' not found in {file_path}")
+                continue
+            sheets[sheet_name] = list(daily_wb[sheet_name].iter_rows(values_only=True))
+    finally:
+        daily_wb.close()
+    return sheets
 
 def update_summary_workbook():
     """Steps 2-5: Update summary.xlsx with missing data."""
@@ -234,6 +431,52 @@ def update_summary_workbook():
         print(f"Error: {SUMMARY_FILE} not found.")
         return
 
+    import numpy as np
+    import pandas as pd
+    import openpyxl
+    from openpyxl.utils import column_index_from_string
+
+    # Get list of available daily Excel files and their dates
+    daily_files = {} # date_str -> filepath
+    with os.scandir(CSV_DIR) as it:
+        for entry in it:
+            if entry.name.startswith('FOB_') and entry.name.endswith('.xlsx'):
+                # Parse date from FOB_YYYYMMDD.xlsx
+                match = _FOB_RE.search(entry.name)
+                if match:
+                    d_str = match.group(1)
+                    # Convert to datetime object for comparison
+                    d_obj = datetime.strptime(d_str, '%Y%m%d')
+                    daily_files[d_obj] = entry.path
+
+    # Key each daily file by its date as int64 nanoseconds so the per-sheet
+    # membership checks below are plain int hash lookups
+    daily_stamps = [
+        (int(np.datetime64(d_obj, 'ns').astype('int64')), d_obj, file_path)
+        for d_obj, file_path in daily_files.items()
+    ]
+
+    # Find the dates each sheet is missing from a read-only pass over the workbook,
+    # so the full (styled, in-memory) workbook is only loaded when there is work to do
+    try:
+        existing_by_sheet = scan_summary_dates()
+    except Exception as e:
+        print(f"Error loading {SUMMARY_FILE}: {e}")
+        return
+        
+    missing_by_sheet = {}
+    for sheet_name, existing_dates in existing_by_sheet.items():
+        updates_needed = []
+        for stamp, d_obj, file_path in daily_stamps:
+            if stamp not in existing_dates:
+                updates_needed.append((d_obj, file_path))
+        if updates_needed:
+            missing_by_sheet[sheet_name] = updates_needed
+    
+    if not missing_by_sheet:
+        print("Summary workbook is up to date.")
+        return
+
     # Load workbook
     try:
         wb = openpyxl.load_workbook(SUMMARY_FILE)
@@ -241,24 +484,10 @@ def update_summary_workbook():
         print(f"Error loading {SUMMARY_FILE}: {e}")
         return
 
-    # Get list of available daily Excel files and their dates
-    daily_files = {} # date_str -> filepath
-    for f in os.listdir(CSV_DIR):
-        if f.startswith('FOB_') and f.endswith('.xlsx'):
-            # Parse date from FOB_YYYYMMDD.xlsx
-            match = re.search(r'FOB_(\d{8})', f)
-            if match:
-                d_str = match.group(1)
-                # Convert to datetime object for comparison
-                d_obj = datetime.strptime(d_str, '%Y%m%d')
-                daily_files[d_obj] = os.path.join(CSV_DIR, f)
-
-    # Iterate through each sheet in our list
-    for sheet_name in SHEET_NAMES:
-        if sheet_name not in wb.sheetnames:
-            print(f"Sheet '{sheet_name}' not found in summary workbook. Skipping.")
-            continue
-            
+    # Pass 1: read each summary table that is missing dates
+    pending = [] # (sheet_name, ws, table, max_row, max_col, col_max_letter, df, updates_needed)
+    sheets_by_file = {} # filepath -> set of sheet names needed from it
+    for sheet_name, updates_needed in missing_by_sheet.items():
         ws = wb[sheet_name]
         
         # Find the table
@@ -276,11 +505,18 @@ def update_summary_workbook():
             table = list(ws.tables.values())[0]
             
         # Read table data to DataFrame
-        # Get range
-        ref = table.ref
-        min_col, min_row, max_col, max_row = range_boundaries(ref)
+        # Get range: summary tables start at A1 (header row), so only the end cell of
+        # the ref needs to be split into its column letters and row, e.g. "A1:F100"
+        start, _, end = table.ref.partition(':')
+        if start != 'A1' or not end:
+            print(f"Table in '{sheet_name}' does not start at A1 ({table.ref}). Skipping.")
+            continue
+        # The table's columns don't change during the update, only its last row
+        col_max_letter = end.rstrip('0123456789')
+        max_row = int(end[len(col_max_letter):])
+        max_col = column_index_from_string(col_max_letter)
         
-        data = ws.iter_rows(min_row=min_row, max_row=max_row, min_col=min_col, max_col=max_col, values_only=True)
+        data = ws.iter_rows(min_row=1, max_row=max_row, min_col=1, max_col=max_col, values_only=True)
         data = list(data)
         
         if not data:
@@ -298,52 +534,51 @@ def update_summary_workbook():
             continue
             
         # Ensure Date column is datetime
-        df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
-
-        # Get existing dates
-        existing_dates = set(df['Date'].dropna().tolist())
-        
-        # Find missing dates
-        updates_needed = []
-        for d_obj, file_path in daily_files.items():
-            if d_obj not in existing_dates:
-                updates_needed.append((d_obj, file_path))
-        
-        if not updates_needed:
-            # print(f"No updates needed for {sheet_name}.")
-            continue
+        df['Date'] = to_datetime_column(df['Date'], sheet_name)
             
         print(f"Updating {sheet_name} with {len(updates_needed)} new dates...")
-        
+        pending.append((sheet_name, ws, table, max_row, max_col, col_max_letter, df, updates_needed))
+        for d_obj, file_path in updates_needed:
+            sheets_by_file.setdefault(file_path, set()).add(sheet_name)
+
+    # Pass 2: open each daily file once, caching the rows of every sheet needed from it
+    daily_sheets = {} # filepath -> {sheet_name: list of row tuples}
+    for file_path, sheet_names in sheets_by_file.items():
+        try:
+            daily_sheets[file_path] = read_daily_sheets(file_path, sheet_names)
+        except Exception as e:
+            print(f"  Error reading {file_path}: {e}")
+
+    # Pass 3: append the new rows to each table and write it back
+    for sheet_name, ws, table, max_row, max_col, col_max_letter, df, updates_needed in pending:
         # Load new data
         new_rows = []
         for d_obj, file_path in updates_needed:
-            try:
-                daily_df = pd.read_excel(file_path, sheet_name=sheet_name)
-                
-                # Ensure Date is datetime in new data
-                if 'Date' in daily_df.columns:
-                    daily_df['Date'] = pd.to_datetime(daily_df['Date'], errors='coerce')
-
-                # Ensure columns match
-                # The daily df might have different column names for 'vs ...'
-                # We need to align them.
-                # The summary table headers are fixed.
-                # The daily file headers are: Month, vs X, Chg1, Flat, Chg2, Date
-                # We assume the structure is compatible (6 columns)
+            data = daily_sheets.get(file_path, {}).get(sheet_name)
+            if not data:
+                continue
                 
-                if len(daily_df.columns) == len(df.columns):
-                    # Rename columns to match summary df to allow concat
-                    daily_df.columns = df.columns
-                    new_rows.append(daily_df)
-                else:
-                    print(f"  Column mismatch in {file_path} for {sheet_name}")
-            except Exception as e:
-                print(f"  Error reading {file_path}: {e}")
+            # Ensure columns match
+            # The daily file headers are: Month, vs X, Chg1, Flat, Chg2, Date
+            # The 'vs ...' header differs per product, so columns are matched by
+            # position against the fixed summary table headers (6 columns)
+            if len(data[0]) == len(df.columns):
+                new_rows.extend(data[1:])
+            else:
+                print(f"  Column mismatch in {file_path} for {sheet_name}")
         
         if new_rows:
             # Append
-            new_data = pd.concat(new_rows, ignore_index=True)
+            new_data = pd.DataFrame(new_rows, columns=df.columns)
+            # Ensure Date is datetime in new data
+            new_data['Date'] = to_datetime_column(new_data['Date'], sheet_name)
+            # The daily files hold the PDF values as text ('47', '-14'), so convert the
+            # value columns to numbers, keeping anything that doesn't parse as-is
+            for col in new_data.columns:
+                if col in ('Month', 'Date'):
+                    continue
+                numbers = pd.to_numeric(new_data[col], errors='coerce')
+                new_data[col] = numbers.where(numbers.notna() | new_data[col].isna(), new_data[col])
             df = pd.concat([df, new_data], ignore_index=True)
             
             # Remove empty rows
@@ -355,22 +590,24 @@ def update_summary_workbook():
             df = df.sort_values('Date')
             
             # Write back to Excel
-            # Clear existing data rows (keep header)
-            # We need to be careful not to destroy the table structure
-            # openpyxl doesn't easily support "clearing table data" while keeping style
-            # Strategy: Write over the cells, then update table range
-            
-            # Convert df to rows
-            updated_data = [list(df.columns)] + df.values.tolist()
+            # We need to be careful not to destroy the table structure or other content
+            # on the sheet, and to keep existing cell styles.
+            # Strategy: Write over the table's cells row by row (one assignment per cell
+            # instead of a ws.cell lookup), clear the table columns of any old rows past
+            # the new end, then update the table range.
+            # Rows are streamed from df rather than materialized as a 2D list first.
             
             # Write data
-            for r_idx, row_data in enumerate(updated_data):
-                for c_idx, value in enumerate(row_data):
-                    ws.cell(row=min_row + r_idx, column=min_col + c_idx, value=value)
+            new_max_row = 1 + len(df)
+            table_rows = ws.iter_rows(min_row=2, max_row=max(new_max_row, max_row), max_col=max_col)
+            for cells, row_data in zip_longest(table_rows, dataframe_rows(df)):
+                if row_data is None:
+                    row_data = (None,) * max_col
+                for cell, value in zip(cells, row_data):
+                    cell.value = value
             
             # Update table reference
-            new_max_row = min_row + len(updated_data) - 1
-            new_ref = f"{openpyxl.utils.get_column_letter(min_col)}{min_row}:{openpyxl.utils.get_column_letter(max_col)}{new_max_row}"
+            new_ref = f"A1:{col_max_letter}{new_max_row}"
             table.ref = new_ref
             
             print(f"  Updated {sheet_name}. New row count: {len(df)}")